@@ -29,6 +29,10 @@ except ImportError:
     print("Vosk is not installed. Please install it with: pip install vosk")
     print("You will also need to download a model from https://alphacephei.com/vosk/models")
 
+# Vietnamese letters with diacritics
+_VIET_DIACRITICS = frozenset('àáảãạăắằẳẵặâấầẩẫậèéẻẽẹêếềểễệìíỉĩịòóỏõọôốồổỗộơớờởỡợùúủũụưứừửữựỳýỷỹỵđÀÁẢÃẠĂẮẰẲẴẶÂẤẦẨẪẬÈÉẺẼẸÊẾỀỂỄỆÌÍỈĨỊÒÓỎÕỌÔỐỒỔỖỘƠỚỜỞỠỢÙÚỦŨỤƯỨỪỬỮỰỲÝỶỸỴĐ')
+_CLEAN_RE = re.compile(r'[^\w\s]')
+
 def convert_to_wav(audio_file, output_file=None):
     """
     Convert an audio file to WAV format with 16kHz sample rate and mono channel.
@@ -62,6 +66,57 @@ def convert_to_wav(audio_file, output_file=None):
     
     return output_file
 
+def batch_convert_to_wav(audio_files, output_dir=None, batch_size=32):
+    """
+    Convert many audio files to 16kHz mono WAV with as few FFmpeg processes as possible.
+    
+    Each FFmpeg invocation takes up to batch_size inputs and writes one output per input.
+    
+    Args:
+        audio_files: List of paths to the input audio files
+        output_dir: Directory to save the WAV files (optional, a temporary directory by default)
+        batch_size: Maximum number of inputs per FFmpeg invocation
+    
+    Returns:
+        Dictionary mapping each input path to its converted WAV file (failed conversions are left out)
+    """
+    if output_dir is None:
+        output_dir = tempfile.mkdtemp()
+    
+    wav_files = {
+        audio_file: os.path.join(output_dir, f"{i}_{os.path.splitext(os.path.basename(audio_file))[0]}.wav")
+        for i, audio_file in enumerate(audio_files)
+    }
+    
+    for start in range(0, len(audio_files), batch_size):
+        batch = audio_files[start:start + batch_size]
+        cmd = ["ffmpeg", "-hide_banner", "-y"]
+        for audio_file in batch:
+            cmd += ["-i", audio_file]
+        for i, audio_file in enumerate(batch):
+            cmd += [
+                "-map", f"{i}:a",
+                "-ar", "16000",  # 16kHz sample rate
+                "-ac", "1",      # Mono channel
+                wav_files[audio_file]
+            ]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode == 0:
+            continue
+        
+        # One bad input fails the whole invocation and can leave partial outputs,
+        # so discard them and convert this batch one file at a time
+        print(f"Batch conversion failed, converting {len(batch)} files individually")
+        for audio_file in batch:
+            if os.path.exists(wav_files[audio_file]):
+                os.remove(wav_files[audio_file])
+            try:
+                convert_to_wav(audio_file, wav_files[audio_file])
+            except FileNotFoundError as e:
+                print(f"Error: {e}")
+    
+    return {audio_file: wav_file for audio_file, wav_file in wav_files.items() if os.path.exists(wav_file)}
+
 def get_audio_duration(audio_file):
     """
     Get the duration of an audio file using ffprobe.
@@ -124,30 +179,23 @@ def extract_vietnamese_vocab(dialogue_data):
     
     return vocab_words
 
-def is_vietnamese_word(word, vietnamese_vocab=None):
+def is_vietnamese_word(word, vietnamese_vocab=frozenset()):
     """
     Check if a word is Vietnamese based on diacritics or vocabulary.
     
     Args:
         word: The word to check
-        vietnamese_vocab: Set of Vietnamese vocabulary words to check against
+        vietnamese_vocab: Set of lowercased Vietnamese vocabulary words to check against
     
     Returns:
         Boolean indicating if the word is Vietnamese
     """
-    if not vietnamese_vocab:
-        vietnamese_vocab = set()
-    
-    # Remove punctuation for checking
-    clean_word = re.sub(r'[^\w\s]', '', word.lower())
-    
-    # Check if the word is in the Vietnamese vocabulary
-    if clean_word in vietnamese_vocab:
+    # Check if the word, without punctuation, is in the Vietnamese vocabulary
+    if vietnamese_vocab and _CLEAN_RE.sub('', word.lower()) in vietnamese_vocab:
         return True
     
     # Check for Vietnamese diacritics
-    vietnamese_pattern = r'[àáảãạăắằẳẵặâấầẩẫậèéẻẽẹêếềểễệìíỉĩịòóỏõọôốồổỗộơớờởỡợùúủũụưứừửữựỳýỷỹỵđÀÁẢÃẠĂẮẰẲẴẶÂẤẦẨẪẬÈÉẺẼẸÊẾỀỂỄỆÌÍỈĨỊÒÓỎÕỌÔỐỒỔỖỘƠỚỜỞỠỢÙÚỦŨỤƯỨỪỬỮỰỲÝỶỸỴĐ]'
-    return bool(re.search(vietnamese_pattern, word))
+    return not _VIET_DIACRITICS.isdisjoint(word)
 
 def recognize_speech(wav_file, model_path="models/vosk-model-small-en-us-0.15"):
     """
@@ -415,13 +463,14 @@ def create_word_timestamp_log(recognized_words, output_path):
     
     print(f"Word timestamp log saved to: {output_path}")
 
-def generate_auto_timestamps(audio_file, model_path="models/vosk-model-small-en-us-0.15"):
+def generate_auto_timestamps(audio_file, model_path="models/vosk-model-small-en-us-0.15", wav_file=None):
     """
     Generate accurate timestamps for an audio file using speech recognition.
     
     Args:
         audio_file: Path to the audio file
         model_path: Path to the Vosk model
+        wav_file: Already converted 16kHz mono WAV of the audio file (optional, converted here if not given)
     
     Returns:
         Path to the generated JSON file, or None if failed
@@ -460,16 +509,18 @@ def generate_auto_timestamps(audio_file, model_path="models/vosk-model-small-en-
     # Extract Vietnamese vocabulary
     vietnamese_vocab = extract_vietnamese_vocab(dialogue_data)
     
-    # Convert the audio file to WAV format
-    print(f"Converting {audio_file} to WAV format...")
-    wav_file = convert_to_wav(audio_file)
+    # Convert the audio file to WAV format unless the caller already did
+    converted_here = wav_file is None
+    if converted_here:
+        print(f"Converting {audio_file} to WAV format...")
+        wav_file = convert_to_wav(audio_file)
     
     # Perform speech recognition
     print(f"Performing speech recognition on {wav_file}...")
     recognized_words = recognize_speech(wav_file, model_path)
     
     # Clean up the temporary WAV file
-    if os.path.dirname(wav_file) != os.path.dirname(audio_file):
+    if converted_here and os.path.dirname(wav_file) != os.path.dirname(audio_file):
         temp_dir = os.path.dirname(wav_file)
         shutil.rmtree(temp_dir, ignore_errors=True)
     
@@ -1,5 +1,7 @@
 import os
+import functools
 import random
+import signal
 import subprocess
 import argparse
 import glob
@@ -8,6 +10,34 @@ from pathlib import Path
 import re
 from remove_punctuation import remove_punctuation_from_dialogue
 
+# Seconds to back off the fast (keyframe) input seek before trimming precisely
+SEEK_PREROLL = 2
+
+def build_seek_args(video_path, start_time, duration):
+    """
+    Build FFmpeg input arguments for a fast but frame-accurate seek into the video.
+    
+    The input seek jumps to a point slightly before start_time using the container
+    index, and the returned trim filter walks the remaining frames at decode time.
+    
+    Args:
+        video_path: Path to the source video
+        start_time: Desired start time in seconds
+        duration: Desired duration in seconds
+        
+    Returns:
+        tuple: (input_args, trim_filter) where trim_filter must be prepended to the video filter chain
+    """
+    coarse_start = max(0, start_time - SEEK_PREROLL)
+    fine_offset = start_time - coarse_start
+    input_args = [
+        "-ss", str(coarse_start),
+        "-t", str(duration + fine_offset),
+        "-i", video_path
+    ]
+    trim_filter = f"trim=start={fine_offset},setpts=PTS-STARTPTS"
+    return input_args, trim_filter
+
 def verify_video_file(video_path):
     """
     Verify that a video file is not corrupt by using ffprobe.
@@ -52,6 +82,93 @@ def verify_video_file(video_path):
         print(f"Error verifying video file: {str(e)}")
         return False
 
+def _kill_process_group(process):
+    """Kill a child process and everything it spawned."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def start_ffmpeg(cmd, capture=True):
+    """
+    Start an FFmpeg command in its own session without waiting for it.
+    
+    Args:
+        cmd: Command line as a list of arguments
+        capture: If True, capture stdout/stderr as text; otherwise inherit them
+        
+    Returns:
+        subprocess.Popen: The running process
+    """
+    pipes = {"stdout": subprocess.PIPE, "stderr": subprocess.PIPE, "text": True} if capture else {}
+    return subprocess.Popen(cmd, stdin=subprocess.DEVNULL, start_new_session=True, **pipes)
+
+def wait_ffmpeg(process, timeout=None):
+    """
+    Wait for a process started with start_ffmpeg.
+    
+    If the wait times out or Python is interrupted, the whole process group is
+    killed before the exception propagates, so no orphaned ffmpeg keeps the output
+    file open.
+    
+    Args:
+        process: Process returned by start_ffmpeg
+        timeout: Maximum number of seconds to wait, or None to wait forever
+        
+    Returns:
+        subprocess.CompletedProcess: The finished process
+    """
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except BaseException:
+        _kill_process_group(process)
+        process.wait()
+        raise
+    return subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
+
+def run_ffmpeg(cmd, timeout=None, capture=True):
+    """
+    Run an FFmpeg command in its own session so it cannot outlive this script.
+    
+    Args:
+        cmd: Command line as a list of arguments
+        timeout: Maximum number of seconds to wait, or None to wait forever
+        capture: If True, capture stdout/stderr as text; otherwise inherit them
+        
+    Returns:
+        subprocess.CompletedProcess: The finished process
+    """
+    return wait_ffmpeg(start_ffmpeg(cmd, capture), timeout)
+
+def cancel_ffmpeg(process):
+    """Kill a background FFmpeg process started with start_ffmpeg and reap it."""
+    _kill_process_group(process)
+    process.communicate()
+
+@functools.lru_cache(maxsize=256)
+def _verify_cached(video_path, mtime_ns, size):
+    return verify_video_file(video_path)
+
+def verify_video_file_cached(video_path):
+    """
+    Verify a video file, only re-running ffprobe when the file has changed.
+    
+    Args:
+        video_path: Path to the video file to verify
+        
+    Returns:
+        bool: True if the video is valid, False otherwise
+    """
+    try:
+        st = os.stat(video_path)
+    except OSError as e:
+        print(f"Error verifying video file: {str(e)}")
+        return False
+    return _verify_cached(video_path, st.st_mtime_ns, st.st_size)
+
 def cleanup_associated_files(dialogue_id, audio_path):
     """
     Clean up JSON and CSV files associated with a dialogue ID after a background video is generated.
@@ -263,6 +380,9 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
         audio_duration = min(10.0, audio_duration)
         print(f"Test mode enabled. Using only the first {audio_duration:.2f} seconds.")
     
+    # Upper bound for any single encode, so a hung ffmpeg doesn't stall a batch forever
+    ffmpeg_timeout = max(300, audio_duration * 10)
+    
     # Get video duration using ffprobe
     cmd = [
         "ffprobe", 
@@ -313,6 +433,9 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
         x_offset = (pad_width - width) // 2
         crop_filter = f"pad={pad_width}:{height}:{x_offset}:0:black"
     
+    # Coarse input seek plus precise trim, so the clip doesn't start on a frozen frame
+    video_input_args, trim_filter = build_seek_args(video_path, start_time, audio_duration)
+    
     # Create a temporary file for the audio (possibly trimmed for test mode)
     temp_audio = "output/temp_audio.mp3"
     
@@ -327,7 +450,7 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
             temp_audio
         ]
         print("Trimming audio to 10 seconds for test mode")
-        subprocess.run(cmd)
+        run_ffmpeg(cmd, timeout=ffmpeg_timeout, capture=False)
         audio_path_to_use = temp_audio
     else:
         audio_path_to_use = audio_path
@@ -530,14 +653,12 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
         # Step 1: Crop the video and add character overlays
         temp_video_with_chars = "output/temp_video_with_chars.mp4"
         filter_complex_chars = (
-            f"[0:v]{crop_filter}[cropped]{character_overlay}"
+            f"[0:v]{trim_filter},{crop_filter}[cropped]{character_overlay}"
         )
         
         cmd_chars = [
             "ffmpeg",
-            "-ss", str(start_time),
-            "-t", str(audio_duration),
-            "-i", video_path,
+            *video_input_args,
             "-i", mira_photo,
             "-i", michael_photo,
             "-filter_complex", filter_complex_chars,
@@ -551,7 +672,7 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
         ]
         
         print("Step 1: Creating video with character overlays")
-        result_chars = subprocess.run(cmd_chars, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        result_chars = run_ffmpeg(cmd_chars, timeout=ffmpeg_timeout)
         
         if result_chars.returncode != 0:
             print(f"Error in step 1: {result_chars.stderr}")
@@ -581,7 +702,7 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
             ]
             
             print("Step 2: Adding subtitles and audio to final video")
-            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            result = run_ffmpeg(cmd, timeout=ffmpeg_timeout)
             
             # Clean up temporary file
             if os.path.exists(temp_video_with_chars):
@@ -598,7 +719,7 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
                 character_overlay = None
             else:
                 # Successfully created video with both characters and subtitles
-                if verify_video_file(output_path):
+                if verify_video_file_cached(output_path):
                     print(f"Successfully generated video with characters and subtitles: {output_path}")
                     return output_path
                 else:
@@ -616,10 +737,8 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
         temp_video_cropped = "output/temp_video_cropped.mp4"
         cmd_crop = [
             "ffmpeg",
-            "-ss", str(start_time),
-            "-t", str(audio_duration),
-            "-i", video_path,
-            "-vf", crop_filter,
+            *video_input_args,
+            "-vf", f"{trim_filter},{crop_filter}",
             "-c:v", "libx264",
             "-preset", "medium",
             "-crf", "23",
@@ -629,7 +748,7 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
         ]
         
         print("Step 1: Creating cropped video")
-        result_crop = subprocess.run(cmd_crop, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        result_crop = run_ffmpeg(cmd_crop, timeout=ffmpeg_timeout)
         
         if result_crop.returncode != 0:
             print(f"Error in step 1: {result_crop.stderr}")
@@ -658,7 +777,7 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
             ]
             
             print("Step 2: Adding subtitles and audio to final video")
-            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            result = run_ffmpeg(cmd, timeout=ffmpeg_timeout)
             
             # Clean up temporary file
             if os.path.exists(temp_video_cropped):
@@ -674,7 +793,7 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
                 subtitle_file = None
             else:
                 # Successfully created video with subtitles
-                if verify_video_file(output_path):
+                if verify_video_file_cached(output_path):
                     print(f"Successfully generated video with subtitles: {output_path}")
                     return output_path
                 else:
@@ -687,11 +806,9 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
         print("Generating video with simplest approach - no subtitles or characters")
         cmd = [
             "ffmpeg",
-            "-ss", str(start_time),
-            "-t", str(audio_duration),
-            "-i", video_path,
+            *video_input_args,
             "-i", audio_path_to_use,
-            "-vf", crop_filter,
+            "-vf", f"{trim_filter},{crop_filter}",
             "-c:v", "libx264",
             "-preset", "medium",
             "-crf", "23",
@@ -705,7 +822,7 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
         ]
         
         print(f"Generating basic video: {output_path}")
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        result = run_ffmpeg(cmd, timeout=ffmpeg_timeout)
         
         if result.returncode != 0:
             print(f"Error generating basic video: {result.stderr}")
@@ -714,10 +831,9 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
             # Ultra-simple command with minimal options
             ultra_simple_cmd = [
                 "ffmpeg",
-                "-ss", str(start_time),
-                "-t", str(audio_duration),
-                "-i", video_path,
+                *video_input_args,
                 "-i", audio_path_to_use,
+                "-vf", trim_filter,
                 "-c:v", "libx264",
                 "-preset", "veryfast",
                 "-crf", "28",
@@ -726,37 +842,56 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
                 output_path
             ]
             
-            subprocess.run(ultra_simple_cmd)
+            run_ffmpeg(ultra_simple_cmd, timeout=ffmpeg_timeout, capture=False)
     
     # Verify the generated video file
     if os.path.exists(output_path):
-        if verify_video_file(output_path):
-            print(f"Background video with audio generated successfully: {output_path}")
-        else:
-            print(f"Generated video file appears to be corrupt: {output_path}")
-            
-            # Try one last approach with very basic settings
-            print("Trying one final encoding approach with basic settings...")
-            basic_cmd = [
-                "ffmpeg",
-                "-ss", str(start_time),
-                "-t", str(audio_duration),
-                "-i", video_path,
-                "-i", audio_path_to_use,
-                "-c:v", "libx264",
-                "-preset", "ultrafast",
-                "-crf", "28",
-                "-c:a", "aac",
-                "-y",
-                output_path
-            ]
-            
-            subprocess.run(basic_cmd)
-            
-            if verify_video_file(output_path):
-                print(f"Basic video encoding successful: {output_path}")
+        # Start the ultrafast fallback speculatively while the primary output is verified,
+        # so a corrupt primary doesn't have to wait for the fallback encode from scratch
+        fallback_path = "output/temp_fallback.mp4"
+        basic_cmd = [
+            "ffmpeg",
+            "-loglevel", "error",
+            *video_input_args,
+            "-i", audio_path_to_use,
+            "-vf", trim_filter,
+            "-c:v", "libx264",
+            "-preset", "ultrafast",
+            "-crf", "28",
+            "-c:a", "aac",
+            "-y",
+            fallback_path
+        ]
+        fallback_process = start_ffmpeg(basic_cmd)
+        
+        try:
+            if verify_video_file_cached(output_path):
+                cancel_ffmpeg(fallback_process)
+                print(f"Background video with audio generated successfully: {output_path}")
             else:
-                print(f"All encoding attempts failed. Video may still be corrupt.")
+                print(f"Generated video file appears to be corrupt: {output_path}")
+                
+                # Use the basic encode that has been running in the background
+                print("Trying one final encoding approach with basic settings...")
+                result = wait_ffmpeg(fallback_process, timeout=ffmpeg_timeout)
+                
+                if result.returncode == 0 and os.path.exists(fallback_path):
+                    os.replace(fallback_path, output_path)
+                else:
+                    print(f"Error in basic encoding: {result.stderr}")
+                
+                if verify_video_file_cached(output_path):
+                    print(f"Basic video encoding successful: {output_path}")
+                else:
+                    print(f"All encoding attempts failed. Video may still be corrupt.")
+        finally:
+            if fallback_process.poll() is None:
+                cancel_ffmpeg(fallback_process)
+            if os.path.exists(fallback_path):
+                try:
+                    os.remove(fallback_path)
+                except:
+                    pass
     else:
         print(f"Output file was not created: {output_path}")
     
@@ -773,13 +908,13 @@ def generate_background(output_path=None, test=False, audio_path=None, simple=Fa
         print(f"Warning: Could not clean up temporary files: {e}")
     
     # Clean up associated JSON and CSV files if requested and video was successfully generated
-    if cleanup and os.path.exists(output_path) and verify_video_file(output_path):
-        print(f"Cleanup condition met: cleanup={cleanup}, file exists={os.path.exists(output_path)}, verified={verify_video_file(output_path)}")
+    if cleanup and os.path.exists(output_path) and verify_video_file_cached(output_path):
+        print(f"Cleanup condition met: cleanup={cleanup}, file exists={os.path.exists(output_path)}, verified={verify_video_file_cached(output_path)}")
         cleanup_associated_files(dialogue_id, audio_path)
     else:
         print(f"Cleanup condition NOT met: cleanup={cleanup}, file exists={os.path.exists(output_path)}")
         if os.path.exists(output_path):
-            print(f"Video verification result: {verify_video_file(output_path)}")
+            print(f"Video verification result: {verify_video_file_cached(output_path)}")
     
     return output_path
 
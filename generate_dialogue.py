@@ -6,7 +6,6 @@ with specific Vietnamese words left untranslated.
 
 import os
 import argparse
-import json
 import time
 import uuid
 import random
@@ -14,6 +13,7 @@ from openai import OpenAI
 import anthropic
 import config
 import utils
+import json_utils
 import re
 
 # Character definitions
@@ -28,7 +28,7 @@ MICHAEL = {
 }
 
 # Possible hooks for the dialogues
-DIALOGUE_HOOKS = [
+DIALOGUE_HOOKS = (
     "romantic tension",
     "mysterious event",
     "let's forget about yesterday/last night",
@@ -52,10 +52,10 @@ DIALOGUE_HOOKS = [
     "ambiguous relationship with ex",
     "vietnamese slang",
     "stupid joke"
-]
+)
 
 # Possible conversation topics
-CONVERSATION_TOPICS = [
+CONVERSATION_TOPICS = (
     "food and dining",
     "travel",
     "family",
@@ -76,11 +76,69 @@ CONVERSATION_TOPICS = [
     "holidays",
     "daily routine",
     "future plans"
-]
+)
 
-def generate_dialogue_with_openai(topic=None, topic_word=None):
+# LLM clients, created on first use and reused so batches share one connection pool
+_OPENAI = None
+_ANTHROPIC = None
+
+def _openai():
+    """Return the shared OpenAI client."""
+    global _OPENAI
+    _OPENAI = _OPENAI or OpenAI(api_key=config.OPENAI_API_KEY)
+    return _OPENAI
+
+def _anthropic():
+    """Return the shared Anthropic client."""
+    global _ANTHROPIC
+    _ANTHROPIC = _ANTHROPIC or anthropic.Anthropic(api_key=config.ANTHROPIC_API_KEY)
+    return _ANTHROPIC
+
+# Speaker lines in a streamed response
+_SPEAKER_LINE_RE = re.compile(r'(?m)^\s*(?:Mira|Michael):')
+
+def _response_is_complete(buffer):
+    """Check whether a partial response already has everything parse_dialogue_response needs."""
+    vietnamese_section, sep, rest = buffer.partition("TOPIC_WORD:")
+    if not sep:
+        return False
+    
+    vietnamese_turns = len(_SPEAKER_LINE_RE.findall(vietnamese_section))
+    if vietnamese_turns == 0:
+        # Broken generation, no point waiting for the rest of it
+        return True
+    
+    _, sep, english_section = rest.partition("COMMON_WORD_2:")
+    if not sep:
+        return False
+    
+    # The English translation is done once it has as many turns as the Vietnamese
+    # dialogue and the last turn has been followed by a blank line
+    english_turns = list(_SPEAKER_LINE_RE.finditer(english_section))
+    if len(english_turns) < vietnamese_turns:
+        return False
+    return "\n\n" in english_section[english_turns[vietnamese_turns - 1].end():]
+
+def _collect_streamed_text(text_chunks):
+    """Accumulate streamed text, stopping as soon as the dialogue response is complete."""
+    buffer = ""
+    for text in text_chunks:
+        buffer += text
+        if "\n" in text and _response_is_complete(buffer):
+            break
+    return buffer
+
+def _pick_unique_hooks(n):
+    """Pick up to n distinct dialogue hooks (without replacement)."""
+    return random.sample(DIALOGUE_HOOKS, k=min(n, len(DIALOGUE_HOOKS)))
+
+def _pick_unique_topics(n):
+    """Pick up to n distinct conversation topics (without replacement)."""
+    return random.sample(CONVERSATION_TOPICS, k=min(n, len(CONVERSATION_TOPICS)))
+
+def generate_dialogue_with_openai(topic=None, topic_word=None, hook=None):
     """Generate a dialogue using OpenAI API."""
-    client = OpenAI(api_key=config.OPENAI_API_KEY)
+    client = _openai()
     
     if not hook:
         hook = random.choice(DIALOGUE_HOOKS)
@@ -131,22 +189,29 @@ def generate_dialogue_with_openai(topic=None, topic_word=None):
     if topic_word:
         prompt += f"\nIMPORTANT: Use '{topic_word}' as the topic word/phrase that appears at least 3 times in the dialogue."
     
-    response = client.chat.completions.create(
+    stream = client.chat.completions.create(
         model="gpt-4",
         messages=[
             {"role": "system", "content": "You are a helpful language learning content creator."},
             {"role": "user", "content": prompt}
         ],
         temperature=0.8,
+        stream=True,
     )
     
-    return response.choices[0].message.content
+    try:
+        return _collect_streamed_text(
+            chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices
+        )
+    finally:
+        stream.close()
 
-def generate_dialogue_with_anthropic(topic=None, topic_word=None):
+def generate_dialogue_with_anthropic(topic=None, topic_word=None, hook=None):
     """Generate a dialogue using Anthropic API."""
-    client = anthropic.Anthropic(api_key=config.ANTHROPIC_API_KEY)
+    client = _anthropic()
     
-    hook = random.choice(DIALOGUE_HOOKS)
+    if not hook:
+        hook = random.choice(DIALOGUE_HOOKS)
     hook2 = random.choice(DIALOGUE_HOOKS)
     if not topic:
         topic = random.choice(CONVERSATION_TOPICS) 
@@ -196,16 +261,15 @@ def generate_dialogue_with_anthropic(topic=None, topic_word=None):
     if topic_word:
         prompt += f"\nIMPORTANT: Use '{topic_word}' as the topic word/phrase that appears at least 3 times in the dialogue."
     
-    response = client.messages.create(
+    with client.messages.stream(
         model="claude-3-7-sonnet-20250219",
         max_tokens=3000,
         messages=[
             {"role": "user", "content": prompt}
         ],
         temperature=0.8,
-    )
-    
-    return response.content[0].text
+    ) as stream:
+        return _collect_streamed_text(stream.text_stream)
 
 def parse_dialogue_response(response_text):
     """Parse the dialogue response into a structured format."""
@@ -338,17 +402,16 @@ def save_dialogue_data(dialogue_data, output_file=None):
                 text = re.sub(r'\s+', ' ', text).strip()
                 dialogue_data[dialogue_list][i]["text"] = text
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(dialogue_data, f, ensure_ascii=False, indent=2)
+    json_utils.dump_json(dialogue_data, output_file, pretty=True)
     
     return output_file
 
-def generate_dialogue(topic=None, topic_word=None, provider="anthropic"):
+def generate_dialogue(topic=None, topic_word=None, provider="anthropic", hook=None):
     """Generate a dialogue using the specified provider."""
     if provider == "openai":
-        response_text = generate_dialogue_with_openai(topic, topic_word)
+        response_text = generate_dialogue_with_openai(topic, topic_word, hook)
     else:
-        response_text = generate_dialogue_with_anthropic(topic, topic_word)
+        response_text = generate_dialogue_with_anthropic(topic, topic_word, hook)
     
     dialogue_data = parse_dialogue_response(response_text)
     
@@ -365,37 +428,47 @@ def main():
     parser.add_argument('--provider', type=str, default=config.DEFAULT_PROVIDER, 
                         choices=['openai', 'anthropic'],
                         help='LLM provider to use')
+    parser.add_argument('--num_dialogues', type=int, default=1,
+                        help='Number of dialogues to generate')
     
     args = parser.parse_args()
     
     utils.ensure_directories_exist()
     
-    print("Generating dialogue...")
-    if args.topic:
-        print(f"Topic: {args.topic}")
-    if args.topic_word:
-        print(f"Topic word/phrase: {args.topic_word}")
+    # Pre-roll hooks and topics once so a batch doesn't repeat them
+    num_dialogues = max(1, args.num_dialogues)
+    hooks = _pick_unique_hooks(num_dialogues)
+    topics = [args.topic] if args.topic else _pick_unique_topics(num_dialogues)
     
-    dialogue_data, output_file = generate_dialogue(args.topic, args.topic_word, args.provider)
-    
-    if dialogue_data:
-        print(f"\nGenerated dialogue saved to: {output_file}")
-        print(f"\nTopic word: {dialogue_data['topic_word']} - {dialogue_data['topic_word_translation']}")
-        print("Common words:")
-        for word in dialogue_data["common_words"]:
-            print(f"- {word['word']} - {word['translation']}")
+    for i in range(num_dialogues):
+        hook = hooks[i % len(hooks)]
+        topic = topics[i % len(topics)]
         
-        print("\nVietnamese Dialogue:")
-        for exchange in dialogue_data["vietnamese_dialogue"]:
-            print(f"{exchange['speaker']}: {exchange['text']}")
-            print()
+        print(f"Generating dialogue {i + 1}/{num_dialogues}...")
+        print(f"Topic: {topic}")
+        if args.topic_word:
+            print(f"Topic word/phrase: {args.topic_word}")
         
-        print("\nEnglish Dialogue (with untranslated Vietnamese words):")
-        for exchange in dialogue_data["english_dialogue"]:
-            print(f"{exchange['speaker']}: {exchange['text']}")
-            print()
-    else:
-        print("Failed to generate dialogue. Please try again.")
+        dialogue_data, output_file = generate_dialogue(topic, args.topic_word, args.provider, hook)
+        
+        if dialogue_data:
+            print(f"\nGenerated dialogue saved to: {output_file}")
+            print(f"\nTopic word: {dialogue_data['topic_word']} - {dialogue_data['topic_word_translation']}")
+            print("Common words:")
+            for word in dialogue_data["common_words"]:
+                print(f"- {word['word']} - {word['translation']}")
+            
+            print("\nVietnamese Dialogue:")
+            for exchange in dialogue_data["vietnamese_dialogue"]:
+                print(f"{exchange['speaker']}: {exchange['text']}")
+                print()
+            
+            print("\nEnglish Dialogue (with untranslated Vietnamese words):")
+            for exchange in dialogue_data["english_dialogue"]:
+                print(f"{exchange['speaker']}: {exchange['text']}")
+                print()
+        else:
+            print("Failed to generate dialogue. Please try again.")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
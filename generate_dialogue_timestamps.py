@@ -12,25 +12,34 @@ This script now includes a complete workflow:
 """
 
 import os
-import json
 import glob
 import re
 import argparse
+import functools
 import subprocess
-from pathlib import Path
+import tempfile
+import wave
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
 import config
-from pydub import AudioSegment
-import nltk
+import json_utils
 import shutil
 
 # Import functions from auto_subtitle.py
 try:
-    from auto_subtitle import generate_auto_timestamps, convert_to_wav, recognize_speech, assign_speakers_to_words, group_words_into_phrases, identify_vietnamese_words, create_word_timestamp_log
+    from auto_subtitle import generate_auto_timestamps, convert_to_wav, batch_convert_to_wav, recognize_speech, assign_speakers_to_words, group_words_into_phrases, identify_vietnamese_words, create_word_timestamp_log
     VOSK_AVAILABLE = True
 except ImportError:
     print("Warning: auto_subtitle module not fully imported. Speech recognition features may not be available.")
     VOSK_AVAILABLE = False
 
+# TinyTag reads durations from file headers without spawning ffprobe
+try:
+    from tinytag import TinyTag
+    TINYTAG_AVAILABLE = True
+except ImportError:
+    TINYTAG_AVAILABLE = False
+
 # Import functions from adjust_timestamps.py
 try:
     from adjust_timestamps import simple_adjust_timestamps, adjust_timestamps
@@ -39,13 +48,31 @@ except ImportError:
     print("Warning: adjust_timestamps module not fully imported. Timestamp adjustment features may not be available.")
     ADJUST_AVAILABLE = False
 
-# Download NLTK data if not already downloaded
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+# Vietnamese letters with diacritics
+_VIET_DIACRITIC_CHARS = ('àáảãạăắằẳẵặâấầẩẫậèéẻẽẹêếềểễệìíỉĩịòóỏõọôốồổỗộơớờởỡợùúủũụưứừửữựỳýỷỹỵđÀÁẢÃẠĂẮẰẲẴẶÂẤẦẨẪẬÈÉẺẼẸÊẾỀỂỄỆÌÍỈĨỊÒÓỎÕỌÔỐỒỔỖỘƠỚỜỞỠỢÙÚỦŨỤƯỨỪỬỮỰỲÝỶỸỴĐ')
 
-def get_audio_duration(audio_file):
+# Common Vietnamese multi-word phrases
+_COMMON_PHRASES = (
+    "bóng đá", "giấc mơ", "Sài Gòn", "trùng hợp", "cổ vũ", "đánh giá",
+    "tiếng Việt", "người Việt", "Việt Nam", "phở bò", "bánh mì", "cà phê",
+    "cơm tấm", "bún chả", "hủ tiếu", "bánh xèo", "chả giò", "gỏi cuốn"
+)
+
+# Precompiled patterns used in the per-word loops
+_WORD_RE = re.compile(r'\b\w+\b')
+_PUNCT_SPLIT_RE = re.compile(r"[a-zA-Z0-9\'-]+|[.,!?;:]")
+_PUNCT_RE = re.compile(r'[.,!?;:]')
+
+# Audio filename patterns, tried in order:
+# old pattern dialogue_ID_elevenlabs_slow.mp3, new pattern without topic word
+# dialogue_ID.mp3, and new pattern with topic word topic_word_ID.mp3
+_FILENAME_RE = re.compile(
+    r'(?:dialogue_(?P<old>[a-f0-9]+)_elevenlabs_slow'
+    r'|dialogue_(?P<new>[a-f0-9]+)'
+    r'|.*_(?P<topic>[a-f0-9]+))\.mp3'
+)
+
+def probe_audio_duration(audio_file):
     """
     Get the duration of an audio file using ffprobe.
     
@@ -62,8 +89,89 @@ def get_audio_duration(audio_file):
         "-of", "default=noprint_wrappers=1:nokey=1", 
         audio_file
     ]
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    return float(result.stdout.strip())
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            stdin=subprocess.DEVNULL, check=True)
+    return float(result.stdout)
+
+@functools.lru_cache(maxsize=512)
+def _get_audio_duration_cached(audio_file, mtime):
+    # WAV headers can be read with the standard library
+    if audio_file.lower().endswith(".wav"):
+        try:
+            with wave.open(audio_file, "rb") as wf:
+                return wf.getnframes() / wf.getframerate()
+        except (wave.Error, EOFError):
+            pass
+    
+    if TINYTAG_AVAILABLE:
+        try:
+            duration = TinyTag.get(audio_file).duration
+            if duration:
+                return duration
+        except Exception:
+            pass
+    
+    # Fall back to ffprobe for containers the header readers can't handle
+    return probe_audio_duration(audio_file)
+
+def get_audio_duration(audio_file):
+    """
+    Get the duration of an audio file from its header, falling back to ffprobe.
+    Results are cached per (path, modification time).
+    
+    Args:
+        audio_file: Path to the audio file
+    
+    Returns:
+        Duration in seconds
+    """
+    return _get_audio_duration_cached(audio_file, os.path.getmtime(audio_file))
+
+def get_audio_durations(audio_files):
+    """
+    Get the durations of many audio files concurrently.
+    
+    Header reads are cheap, but files that need the ffprobe fallback are probed in
+    parallel instead of one subprocess after another.
+    
+    Args:
+        audio_files: List of paths to audio files
+    
+    Returns:
+        Dictionary mapping each path to its duration in seconds (files that
+        could not be probed are left out)
+    """
+    def probe(audio_file):
+        try:
+            return audio_file, get_audio_duration(audio_file)
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            print(f"Could not get duration of {audio_file}: {e}")
+            return audio_file, None
+    
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        results = executor.map(probe, audio_files)
+        return {audio_file: duration for audio_file, duration in results if duration is not None}
+
+# Dialogue data keyed by dialogue ID, built on first lookup
+_DIALOGUE_INDEX = None
+
+def _build_dialogue_index():
+    """
+    Load every dialogue file once and index it by dialogue ID.
+    
+    Returns:
+        Dictionary mapping dialogue IDs to dialogue data
+    """
+    index = {}
+    if not os.path.isdir("data/dialogues"):
+        return index
+    with os.scandir("data/dialogues") as entries:
+        file_paths = [entry.path for entry in entries if entry.name.endswith(".json")]
+    for file_path in file_paths:
+        dialogue_data = json_utils.load_json(file_path)
+        if "id" in dialogue_data:
+            index[dialogue_data["id"]] = dialogue_data
+    return index
 
 def find_dialogue_file(dialogue_id):
     """
@@ -75,93 +183,101 @@ def find_dialogue_file(dialogue_id):
     Returns:
         The dialogue data as a dictionary, or None if not found
     """
-    dialogue_files = glob.glob("data/dialogues/*.json")
-    for file_path in dialogue_files:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            dialogue_data = json.load(f)
-            if dialogue_data["id"] == dialogue_id:
+    global _DIALOGUE_INDEX
+    if _DIALOGUE_INDEX is None:
+        # Dialogue files are saved as {topic_word}_{id}.json, so try the name
+        # first and only load every file if that doesn't find it
+        for file_path in glob.glob(f"data/dialogues/*_{glob.escape(dialogue_id)}.json"):
+            dialogue_data = json_utils.load_json(file_path)
+            if dialogue_data.get("id") == dialogue_id:
                 return dialogue_data
-    return None
+        _DIALOGUE_INDEX = _build_dialogue_index()
+    return _DIALOGUE_INDEX.get(dialogue_id)
+
+def _vocab_phrases(vietnamese_vocab):
+    """Common Vietnamese multi-word phrases plus any multi-word phrases from the vocabulary."""
+    phrases = list(_COMMON_PHRASES)
+    if vietnamese_vocab:
+        for word in vietnamese_vocab:
+            if " " in word and word not in phrases:
+                phrases.append(word)
+    return phrases
 
-def is_vietnamese_word(word, vietnamese_vocab=None):
+@functools.lru_cache(maxsize=128)
+def _build_tokenizer(vocab_frozen):
     """
-    Check if a word is Vietnamese based on diacritics or vocabulary.
+    Build one regex that tokenizes a dialogue line in a single left-to-right pass.
+    
+    Alternatives are tried in order at each position: a <vietnamese> tag, a known
+    multi-word phrase (longest first), a Vietnamese word (vocabulary word or any word
+    with diacritics), or else a run of other non-space characters.
     
     Args:
-        word: The word to check
-        vietnamese_vocab: Set of Vietnamese vocabulary words to check against
+        vocab_frozen: Frozenset of lowercased Vietnamese vocabulary words
     
     Returns:
-        Boolean indicating if the word is Vietnamese
+        Compiled regex with named groups viettag, phrase, vword and chunk
     """
-    if not vietnamese_vocab:
-        vietnamese_vocab = set()
-    
-    # Remove punctuation for checking
-    clean_word = re.sub(r'[^\w\s]', '', word.lower())
-    
-    # Check if the word is in the Vietnamese vocabulary
-    if clean_word in vietnamese_vocab:
-        return True
-    
-    # Check for Vietnamese diacritics
-    vietnamese_pattern = r'[àáảãạăắằẳẵặâấầẩẫậèéẻẽẹêếềểễệìíỉĩịòóỏõọôốồổỗộơớờởỡợùúủũụưứừửữựỳýỷỹỵđÀÁẢÃẠĂẮẰẲẴẶÂẤẦẨẪẬÈÉẺẼẸÊẾỀỂỄỆÌÍỈĨỊÒÓỎÕỌÔỐỒỔỖỘƠỚỜỞỠỢÙÚỦŨỤƯỨỪỬỮỰỲÝỶỸỴĐ]'
-    return bool(re.search(vietnamese_pattern, word))
+    phrases = sorted(_vocab_phrases(vocab_frozen), key=len, reverse=True)
+    phrase_alt = '|'.join(re.escape(phrase) for phrase in phrases)
+    
+    # Single vocabulary words match case-insensitively, like auto_subtitle.is_vietnamese_word
+    single_words = sorted((w for w in vocab_frozen if _WORD_RE.fullmatch(w)), key=len, reverse=True)
+    vword_alt = r'\w*[' + _VIET_DIACRITIC_CHARS + r']\w*'
+    if single_words:
+        vword_alt = '(?i:' + '|'.join(re.escape(w) for w in single_words) + ')|' + vword_alt
+    vword = r'\b(?:' + vword_alt + r')\b'
+    
+    special = r'<vietnamese>[^<]+</vietnamese>|' + phrase_alt + '|' + vword
+    return re.compile(
+        r'(?P<viettag><vietnamese>(?P<viet_content>[^<]+)</vietnamese>)'
+        r'|(?P<phrase>' + phrase_alt + ')'
+        r'|(?P<vword>' + vword + ')'
+        r'|(?P<chunk>(?:(?!' + special + r')\S)+)'
+    )
 
-def extract_vietnamese_phrases(text, vietnamese_vocab=None):
+@functools.lru_cache(maxsize=4096)
+def _split_text_cached(text, vocab_frozen):
     """
-    Extract Vietnamese phrases from text, including multi-word phrases.
+    Tokenize a line into (text, viet_words, is_punctuation) tuples.
+    
+    The result is immutable so it can be shared between callers through the cache.
     
     Args:
-        text: The text to analyze
-        vietnamese_vocab: Set of Vietnamese vocabulary words to check against
+        text: The text to split
+        vocab_frozen: Frozenset of lowercased Vietnamese vocabulary words
     
     Returns:
-        List of Vietnamese phrases found in the text
+        Tuple of (text, viet_words, is_punctuation) tuples
     """
-    # First, identify common Vietnamese multi-word phrases
-    common_phrases = [
-        "bóng đá", "giấc mơ", "Sài Gòn", "trùng hợp", "cổ vũ", "đánh giá",
-        "tiếng Việt", "người Việt", "Việt Nam", "phở bò", "bánh mì", "cà phê",
-        "cơm tấm", "bún chả", "hủ tiếu", "bánh xèo", "chả giò", "gỏi cuốn"
-    ]
+    tokenizer = _build_tokenizer(vocab_frozen)
     
-    # Add any phrases from the vocabulary
-    if vietnamese_vocab:
-        for word in vietnamese_vocab:
-            if " " in word and word not in common_phrases:
-                common_phrases.append(word)
-    
-    # Find all Vietnamese phrases in the text
-    viet_phrases = []
-    
-    # First check for multi-word phrases
-    for phrase in common_phrases:
-        if phrase in text:
-            viet_phrases.append(phrase)
-    
-    # Then check for individual Vietnamese words
-    # But exclude words that are already part of identified phrases
-    words = re.findall(r'\b\w+\b', text)
-    for word in words:
-        if is_vietnamese_word(word, vietnamese_vocab):
-            # Check if this word is already part of a phrase
-            is_in_phrase = False
-            for phrase in viet_phrases:
-                if word in phrase.split():
-                    is_in_phrase = True
-                    break
-            
-            if not is_in_phrase:
-                viet_phrases.append(word)
+    words = []
+    for match in tokenizer.finditer(text):
+        kind = match.lastgroup
+        if kind == "viettag":
+            # It's a Vietnamese tag
+            words.append((match.group("viettag"), (match.group("viet_content"),), False))
+        elif kind == "phrase" or kind == "vword":
+            # It's a Vietnamese phrase or word
+            words.append((match.group(kind), (match.group(kind),), False))
+        else:
+            # Split punctuation off the token, unless that would leave a single piece
+            chunk = match.group("chunk")
+            punctuation_split = _PUNCT_SPLIT_RE.findall(chunk)
+            for token in (punctuation_split if len(punctuation_split) > 1 else [chunk]):
+                words.append((token, (), bool(_PUNCT_RE.match(token))))
     
-    return viet_phrases
+    return tuple(words)
 
 def split_text_into_words(text, vietnamese_vocab=None):
     """
     Split text into individual words for more precise subtitle timing.
     Ensures Vietnamese words and phrases aren't broken apart.
     
+    estimate_timestamps reads the cached tuples from _split_text_cached directly;
+    this is kept as the public entry point and returns fresh dicts callers may modify.
+    
     Args:
         text: The text to split
         vietnamese_vocab: Set of Vietnamese vocabulary words to check against
@@ -169,101 +285,17 @@ def split_text_into_words(text, vietnamese_vocab=None):
     Returns:
         List of dictionaries with text and Vietnamese word flags
     """
-    # First, identify and protect Vietnamese tags
-    # Find all Vietnamese tag pairs and their content
-    vietnamese_tags = re.findall(r'<vietnamese>([^<]+)</vietnamese>', text)
-    text_with_placeholders = text
-    
-    # Replace each Vietnamese tag pair with a special token
-    viet_tag_map = {}
-    for i, viet_content in enumerate(vietnamese_tags):
-        placeholder = f"__VIET_TAG_{i}__"
-        viet_tag_map[placeholder] = {
-            "text": viet_content,
-            "full_tag": f"<vietnamese>{viet_content}</vietnamese>"
-        }
-        text_with_placeholders = text_with_placeholders.replace(
-            f"<vietnamese>{viet_content}</vietnamese>", 
-            f" {placeholder} "
-        )
-    
-    # Extract all Vietnamese phrases in the text (those not in tags)
-    viet_phrases = extract_vietnamese_phrases(text_with_placeholders, vietnamese_vocab)
-    
-    # Create a clean version of the text for processing
-    clean_text = text_with_placeholders
-    
-    # Sort phrases by length (descending) to handle longer phrases first
-    sorted_phrases = sorted(viet_phrases, key=len, reverse=True)
-    
-    # Replace each Vietnamese phrase with a special token
-    token_map = {}
-    for i, phrase in enumerate(sorted_phrases):
-        token = f"__VIET_{i}__"
-        token_map[token] = {"text": phrase, "is_viet": True}
-        clean_text = clean_text.replace(phrase, f" {token} ")
-    
-    # Split the text into words, preserving punctuation as separate tokens
-    # This regex splits on whitespace but keeps punctuation as separate tokens
-    word_tokens = []
-    for part in re.findall(r'\S+|\s+', clean_text):
-        if part.strip():
-            # Check if it's a Vietnamese tag placeholder
-            if part.strip() in viet_tag_map:
-                word_tokens.append(part.strip())
-            # Check if it's a Vietnamese token
-            elif part.startswith("__VIET_") and part.endswith("__"):
-                word_tokens.append(part)
-            else:
-                # Check if the token contains punctuation
-                punctuation_split = re.findall(r'[a-zA-Z0-9\'-]+|[.,!?;:]', part)
-                if len(punctuation_split) > 1:
-                    word_tokens.extend(punctuation_split)
-                else:
-                    word_tokens.append(part)
-    
-    # Process tokens into words
-    words = []
-    for token in word_tokens:
-        # Check if it's a Vietnamese tag placeholder
-        if token in viet_tag_map:
-            # It's a Vietnamese tag
-            viet_info = viet_tag_map[token]
-            words.append({
-                "text": viet_info["full_tag"],
-                "viet_words": [viet_info["text"]],
-                "is_punctuation": False
-            })
-        elif token.startswith("__VIET_") and token.endswith("__"):
-            # It's a Vietnamese phrase
-            phrase_info = token_map[token]
-            words.append({
-                "text": phrase_info["text"],
-                "viet_words": [phrase_info["text"]],
-                "is_punctuation": False
-            })
-        elif re.match(r'[.,!?;:]', token):
-            # It's punctuation
-            words.append({
-                "text": token,
-                "viet_words": [],
-                "is_punctuation": True
-            })
-        else:
-            # It's a regular word
-            words.append({
-                "text": token,
-                "viet_words": [],
-                "is_punctuation": False
-            })
-    
-    return words
+    return [
+        {"text": word_text, "viet_words": list(viet_words), "is_punctuation": is_punctuation}
+        for word_text, viet_words, is_punctuation in _split_text_cached(text, frozenset(vietnamese_vocab or ()))
+    ]
 
-def estimate_timestamps(audio_file, dialogue_data):
+def estimate_timestamps(audio_file, dialogue_data, duration=None):
     """
     Estimate timestamps for each line in the dialogue, breaking into individual words.
     This approach distributes the audio duration proportionally based on text length
     and then further breaks down each line into individual words for more precise timing.
+    If duration is given it is used instead of probing the audio file.
     """
     if not dialogue_data or "english_dialogue" not in dialogue_data:
         return None
@@ -278,8 +310,10 @@ def estimate_timestamps(audio_file, dialogue_data):
             if "word" in word_data and word_data["word"]:
                 vietnamese_vocab.add(word_data["word"].lower())
     
+    vocab_frozen = frozenset(vietnamese_vocab)
+    
     # Get the total duration of the audio file
-    total_duration = get_audio_duration(audio_file)
+    total_duration = duration if duration is not None else get_audio_duration(audio_file)
     
     # Calculate the total text length
     total_text_length = sum(len(line["text"]) for line in dialogue_data["english_dialogue"])
@@ -301,55 +335,49 @@ def estimate_timestamps(audio_file, dialogue_data):
             current_time += 0.05  # 50ms pause
         
         # Split the line into individual words
-        words = split_text_into_words(line["text"], vietnamese_vocab)
+        words = _split_text_cached(line["text"], vocab_frozen)
         
-        # Calculate duration for each word proportionally
-        # Punctuation gets a very small duration
-        word_durations = []
-        total_word_length = sum(3 if word["is_punctuation"] else len(word["text"]) for word in words)
+        if not words:
+            current_time += line_duration
+            continue
         
-        for word in words:
-            if word["is_punctuation"]:
-                # Punctuation gets a fixed small duration (100ms)
-                word_duration = 0.1
-            else:
-                # Regular words get duration proportional to their length
-                word_length = len(word["text"])
-                word_duration = (word_length / total_word_length) * line_duration
-                # Ensure minimum duration for very short words
-                word_duration = max(word_duration, 0.2)
-            
-            word_durations.append(word_duration)
+        # Calculate duration for each word proportionally
+        # Punctuation gets a fixed small duration (100ms), regular words get
+        # duration proportional to their length with a 200ms minimum
+        is_punct = np.fromiter((is_punctuation for _, _, is_punctuation in words), dtype=bool, count=len(words))
+        lengths = np.fromiter((3 if is_punctuation else len(word_text) for word_text, _, is_punctuation in words),
+                              dtype=np.float64, count=len(words))
+        word_durations = np.where(is_punct, 0.1, np.maximum(lengths / lengths.sum() * line_duration, 0.2))
         
         # Adjust durations to match the total line duration
-        total_word_duration = sum(word_durations)
+        total_word_duration = word_durations.sum()
         if total_word_duration > 0:
-            adjustment_factor = line_duration / total_word_duration
-            word_durations = [duration * adjustment_factor for duration in word_durations]
+            word_durations *= line_duration / total_word_duration
         
-        # Create timestamp entries for each word
-        word_start_time = current_time
+        # End time of each word in whole centiseconds, rounded once for the whole line
+        word_ends_cs = np.rint((current_time + word_durations.cumsum()) * 100).astype(np.int64).tolist()
         
         # Group words into small phrases (1-3 words) for better readability
         phrase_words = []
-        phrase_start_time = word_start_time
-        phrase_end_time = word_start_time
-        phrase_viet_words = []
+        phrase_start_cs = round(current_time * 100)
+        phrase_end_cs = phrase_start_cs
+        phrase_viet_words = {}  # Ordered set of Vietnamese words in the phrase
         
-        for j, (word, word_duration) in enumerate(zip(words, word_durations)):
-            # Update the end time for this word
-            word_end_time = word_start_time + word_duration
+        for j, (word_text, viet_words, is_punctuation) in enumerate(words):
+            # End time for this word
+            word_end_cs = word_ends_cs[j]
             
             # Add word to current phrase
-            phrase_words.append(word["text"])
-            phrase_end_time = word_end_time
-            phrase_viet_words.extend(word["viet_words"])
+            phrase_words.append(word_text)
+            phrase_end_cs = word_end_cs
+            if viet_words:
+                phrase_viet_words.update(dict.fromkeys(viet_words))
             
             # Check if we should end the current phrase
             end_phrase = False
             
             # End phrase on punctuation
-            if word["is_punctuation"] and word["text"] in ['.', '!', '?', ';']:
+            if is_punctuation and word_text in ['.', '!', '?', ';']:
                 end_phrase = True
             
             # End phrase after 3 words or at the end of the line
@@ -365,60 +393,57 @@ def estimate_timestamps(audio_file, dialogue_data):
                     timestamp = {
                         "speaker": line["speaker"],
                         "text": phrase_text,
-                        "viet_words": list(set(phrase_viet_words)),  # Remove duplicates
-                        "start_time": round(phrase_start_time, 2),
-                        "end_time": round(phrase_end_time, 2)
+                        "viet_words": list(phrase_viet_words),
+                        "start_time": phrase_start_cs / 100,
+                        "end_time": phrase_end_cs / 100
                     }
                     timestamps.append(timestamp)
                 
                 # Reset for next phrase
                 phrase_words = []
-                phrase_start_time = word_end_time
-                phrase_viet_words = []
-            
-            # Update start time for the next word
-            word_start_time = word_end_time
+                phrase_start_cs = word_end_cs
+                phrase_viet_words = {}
         
         # Update current time for the next line
         current_time += line_duration
     
     return timestamps
 
-def generate_timestamp_json(audio_file):
+def _extract_dialogue_id(filename):
+    """
+    Extract the dialogue ID from an audio filename.
+    
+    Args:
+        filename: Audio file name (without directory)
+    
+    Returns:
+        The dialogue ID, or None if the filename doesn't match any known pattern
+    """
+    match = _FILENAME_RE.match(filename)
+    if not match:
+        return None
+    return match.group("old") or match.group("new") or match.group("topic")
+
+def generate_timestamp_json(audio_file, duration=None, dialogue_data=None, pretty=False):
     """Generate a JSON file with dialogue timestamps for the given audio file."""
     # Extract the dialogue ID from the filename
     filename = os.path.basename(audio_file)
     
-    # Try different filename patterns
-    # Old pattern: dialogue_ID_elevenlabs_slow.mp3
-    old_pattern_match = re.match(r'dialogue_([a-f0-9]+)_elevenlabs_slow\.mp3', filename)
-    
-    # New pattern without topic word: dialogue_ID.mp3
-    new_pattern_without_topic_match = re.match(r'dialogue_([a-f0-9]+)\.mp3', filename)
-    
-    # New pattern with topic word: topic_word_ID.mp3
-    new_pattern_with_topic_match = re.match(r'.*_([a-f0-9]+)\.mp3', filename)
-    
-    # Determine which pattern matched
-    if old_pattern_match:
-        dialogue_id = old_pattern_match.group(1)
-    elif new_pattern_without_topic_match:
-        dialogue_id = new_pattern_without_topic_match.group(1)
-    elif new_pattern_with_topic_match:
-        dialogue_id = new_pattern_with_topic_match.group(1)
-    else:
+    dialogue_id = _extract_dialogue_id(filename)
+    if not dialogue_id:
         print(f"Could not extract dialogue ID from filename: {filename}")
         return None
     
-    # Find the corresponding dialogue file
-    dialogue_data = find_dialogue_file(dialogue_id)
+    # Find the corresponding dialogue file, unless the caller already looked it up
+    if dialogue_data is None:
+        dialogue_data = find_dialogue_file(dialogue_id)
     
     if not dialogue_data:
         print(f"Could not find dialogue file for ID: {dialogue_id}")
         return None
     
     # Estimate timestamps
-    timestamps = estimate_timestamps(audio_file, dialogue_data)
+    timestamps = estimate_timestamps(audio_file, dialogue_data, duration)
     
     if not timestamps:
         print(f"Could not estimate timestamps for: {filename}")
@@ -438,13 +463,12 @@ def generate_timestamp_json(audio_file):
     output_path = os.path.join(config.AUDIO_PATH, output_filename)
     
     # Write the JSON file
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    json_utils.dump_json(output_data, output_path, pretty)
     
     print(f"Generated timestamp JSON file: {output_path}")
     return output_path
 
-def process_audio_file_complete(audio_file, model_path="models/vosk-model-small-en-us-0.15", skip_steps=None):
+def process_audio_file_complete(audio_file, model_path="models/vosk-model-small-en-us-0.15", skip_steps=None, duration=None, wav_file=None, dialogue_data=None, pretty=False):
     """
     Process an audio file through the complete workflow:
     1. Generate initial timestamps
@@ -455,6 +479,10 @@ def process_audio_file_complete(audio_file, model_path="models/vosk-model-small-
         audio_file: Path to the audio file
         model_path: Path to the Vosk model directory
         skip_steps: List of steps to skip (e.g., ["auto", "adjust"])
+        duration: Audio duration in seconds, if already known
+        wav_file: Already converted WAV of the audio file for speech recognition, if any
+        dialogue_data: Dialogue data for the audio file, if already loaded
+        pretty: Whether to indent the initial timestamp JSON
     
     Returns:
         Path to the final JSON file
@@ -463,7 +491,7 @@ def process_audio_file_complete(audio_file, model_path="models/vosk-model-small-
         skip_steps = []
     
     print(f"\n=== STEP 1: Generating initial timestamps for {audio_file} ===")
-    initial_json_path = generate_timestamp_json(audio_file)
+    initial_json_path = generate_timestamp_json(audio_file, duration, dialogue_data, pretty)
     
     if not initial_json_path:
         print(f"Failed to generate initial timestamps for {audio_file}")
@@ -471,19 +499,7 @@ def process_audio_file_complete(audio_file, model_path="models/vosk-model-small-
     
     # Extract dialogue ID from the filename
     filename = os.path.basename(audio_file)
-    dialogue_id = None
-    
-    # Try different filename patterns
-    old_pattern_match = re.match(r'dialogue_([a-f0-9]+)_elevenlabs_slow\.mp3', filename)
-    new_pattern_without_topic_match = re.match(r'dialogue_([a-f0-9]+)\.mp3', filename)
-    new_pattern_with_topic_match = re.match(r'.*_([a-f0-9]+)\.mp3', filename)
-    
-    if old_pattern_match:
-        dialogue_id = old_pattern_match.group(1)
-    elif new_pattern_without_topic_match:
-        dialogue_id = new_pattern_without_topic_match.group(1)
-    elif new_pattern_with_topic_match:
-        dialogue_id = new_pattern_with_topic_match.group(1)
+    dialogue_id = _extract_dialogue_id(filename)
     
     if not dialogue_id:
         print(f"Could not extract dialogue ID from filename: {filename}")
@@ -492,7 +508,7 @@ def process_audio_file_complete(audio_file, model_path="models/vosk-model-small-
     # Step 2: Run speech recognition if available and not skipped
     if VOSK_AVAILABLE and "auto" not in skip_steps:
         print(f"\n=== STEP 2: Running speech recognition for {audio_file} ===")
-        auto_json_path = generate_auto_timestamps(audio_file, model_path)
+        auto_json_path = generate_auto_timestamps(audio_file, model_path, wav_file)
         
         if not auto_json_path:
             print(f"Failed to generate auto timestamps for {audio_file}")
@@ -527,6 +543,19 @@ def process_audio_file_complete(audio_file, model_path="models/vosk-model-small-
             print("Speech recognition not available")
         return initial_json_path
 
+def _process_audio_file_job(job):
+    """Process one (audio_file, model_path, skip_steps, duration, wav_file, dialogue_data, pretty) job in a worker process."""
+    audio_file, model_path, skip_steps, duration, wav_file, dialogue_data, pretty = job
+    return process_audio_file_complete(audio_file, model_path, skip_steps, duration, wav_file, dialogue_data, pretty)
+
+def default_jobs():
+    """
+    Default number of worker processes.
+    
+    Each worker loads its own Vosk model into RAM, so this is capped at 4.
+    """
+    return min(4, os.cpu_count() or 1)
+
 def main():
     """Main function to process all audio files."""
     parser = argparse.ArgumentParser(description="Generate dialogue timestamps with complete workflow")
@@ -535,6 +564,10 @@ def main():
                         help="Path to the Vosk model directory")
     parser.add_argument("--skip", type=str, nargs="+", choices=["auto", "adjust"], 
                         help="Steps to skip: 'auto' for speech recognition, 'adjust' for timestamp adjustment")
+    parser.add_argument("--jobs", type=int, default=default_jobs(),
+                        help="Number of audio files to process in parallel (each worker loads its own Vosk model)")
+    parser.add_argument("--pretty", action="store_true",
+                        help="Write indented JSON instead of compact JSON")
     args = parser.parse_args()
     
     # Process a specific audio file if provided
@@ -543,21 +576,21 @@ def main():
             print(f"Audio file not found: {args.audio}")
             return
         
-        process_audio_file_complete(args.audio, args.model, args.skip)
+        process_audio_file_complete(args.audio, args.model, args.skip, pretty=args.pretty)
         return
     
-    # Otherwise, process all audio files
+    # Otherwise, process all audio files: the old naming convention
+    # (dialogue_*_elevenlabs_slow.mp3) plus any new-style MP3 files that
+    # don't start with "dialogue_", classified in a single directory pass
     audio_files = []
-    
-    # Old naming convention
-    old_files = glob.glob(os.path.join(config.AUDIO_PATH, "dialogue_*_elevenlabs_slow.mp3"))
-    audio_files.extend(old_files)
-    
-    # New naming convention - look for any MP3 files that aren't already covered
-    all_mp3_files = glob.glob(os.path.join(config.AUDIO_PATH, "*.mp3"))
-    for file in all_mp3_files:
-        if file not in old_files and not os.path.basename(file).startswith("dialogue_"):
-            audio_files.append(file)
+    if os.path.isdir(config.AUDIO_PATH):
+        with os.scandir(config.AUDIO_PATH) as entries:
+            audio_files = [
+                entry.path for entry in entries
+                if entry.is_file()
+                and entry.name.endswith(".mp3")
+                and (entry.name.endswith("_elevenlabs_slow.mp3") or not entry.name.startswith("dialogue_"))
+            ]
     
     if not audio_files:
         print("No audio files found.")
@@ -565,9 +598,43 @@ def main():
     
     print(f"Found {len(audio_files)} audio files to process.")
     
+    # Probe all durations and load all dialogues up front so the workers don't have to
+    durations = get_audio_durations(audio_files)
+    dialogue_index = _build_dialogue_index()
+    
+    # Convert everything to WAV for speech recognition in as few FFmpeg runs as possible
+    wav_files = {}
+    wav_dir = None
+    if VOSK_AVAILABLE and "auto" not in (args.skip or []):
+        wav_dir = tempfile.mkdtemp()
+        print(f"Converting {len(audio_files)} audio files to WAV format...")
+        wav_files = batch_convert_to_wav(audio_files, wav_dir)
+    
     # Process each audio file through the complete workflow
-    for audio_file in audio_files:
-        process_audio_file_complete(audio_file, args.model, args.skip)
+    jobs = [
+        (audio_file, args.model, args.skip, durations.get(audio_file), wav_files.get(audio_file),
+         dialogue_index.get(_extract_dialogue_id(os.path.basename(audio_file))), args.pretty)
+        for audio_file in audio_files
+    ]
+    max_workers = max(1, min(args.jobs, len(jobs)))
+    
+    try:
+        if max_workers == 1:
+            for job in jobs:
+                _process_audio_file_job(job)
+            return
+        
+        print(f"Processing with {max_workers} parallel workers.")
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_process_audio_file_job, job): job[0] for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error processing {futures[future]}: {e}")
+    finally:
+        if wav_dir:
+            shutil.rmtree(wav_dir, ignore_errors=True)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -11,6 +11,7 @@ from openai import OpenAI
 import anthropic
 import config
 import utils
+import json_utils
 import re
 
 def map_difficulty_level(difficulty_number):
@@ -127,16 +128,14 @@ def parse_vocab_response(response_text):
     
     return vocab_list
 
-def save_vocab_to_file(vocab_list, output_file=None, topic="general"):
-    """Save the vocabulary list to a file."""
+def save_vocab_to_file(vocab_list, output_file=None, topic="general", pretty=False):
+    """Save the vocabulary list to a file (compact JSON unless pretty is set)."""
     if output_file is None:
         # Include topic in filename
         safe_topic = ''.join(c if c.isalnum() or c in ['-', '_'] else '_' for c in topic)
         output_file = f"data/vocab_list_{safe_topic}_{int(time.time())}.json"
     
-    import json
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(vocab_list, f, ensure_ascii=False, indent=2)
+    json_utils.dump_json(vocab_list, output_file, pretty)
     
     # Also save just the words to the main vocab list file
     words_only = [item["word"] for item in vocab_list]
@@ -156,6 +155,7 @@ def main():
                         choices=['openai', 'anthropic'],
                         help='LLM provider to use')
     parser.add_argument('--output', type=str, help='Output file path')
+    parser.add_argument('--pretty', action='store_true', help='Write indented JSON instead of compact JSON')
     
     args = parser.parse_args()
     
@@ -173,7 +173,7 @@ def main():
     
     vocab_list = parse_vocab_response(response_text)
     
-    output_file = save_vocab_to_file(vocab_list, args.output, args.topic)
+    output_file = save_vocab_to_file(vocab_list, args.output, args.topic, args.pretty)
     
     print(f"Generated {len(vocab_list)} vocabulary words and saved to {output_file}")
     print("\nSample vocabulary words:")
@@ -0,0 +1,48 @@
+"""
+JSON file helpers shared by the content generation scripts.
+
+This module has no import-time side effects, so scripts can use it without
+pulling in the logging setup and configuration that utils.py loads.
+"""
+
+import os
+import json
+
+# orjson reads and writes JSON considerably faster than the standard library
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def load_json(file_path):
+    """Load a JSON file, using orjson when it is available."""
+    if ORJSON_AVAILABLE:
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def dump_json(data, file_path, pretty=False):
+    """
+    Write data as UTF-8 JSON (compact unless pretty), using orjson when it is available.
+    
+    The JSON goes to a temporary file that then replaces file_path, so an
+    interrupted write never leaves a truncated file behind.
+    """
+    temp_path = file_path + '.tmp'
+    try:
+        if ORJSON_AVAILABLE:
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+            with open(temp_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=option))
+        else:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                if pretty:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                else:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
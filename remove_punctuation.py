@@ -1,24 +1,72 @@
-import json
 import os
+import argparse
 import re
-import glob
+import json_utils
 
-def remove_punctuation_from_dialogue(json_file):
+# Spans that keep their punctuation: Vietnamese tag pairs, other HTML-like
+# tags, and parenthetical expressions like (vietnamese)
+_PROTECTED_RE = re.compile(r'<vietnamese>[^<]+</vietnamese>|<[^>]+>|\([^)]+\)')
+_PUNCT_DELETE = str.maketrans('', '', '.,!?;:"[]{}')
+
+def strip_punctuation(text):
+    """
+    Remove punctuation from text in a single pass, leaving tags and
+    parenthetical expressions untouched.
+    
+    Args:
+        text: The text to clean
+    
+    Returns:
+        The text without punctuation outside the protected spans
+    """
+    parts = []
+    pos = 0
+    for match in _PROTECTED_RE.finditer(text):
+        parts.append(text[pos:match.start()].translate(_PUNCT_DELETE))
+        parts.append(match.group())
+        pos = match.end()
+    parts.append(text[pos:].translate(_PUNCT_DELETE))
+    return ''.join(parts)
+
+def _is_pretty_json(file_path):
+    """Check whether a JSON file was written indented (pretty) rather than compact."""
+    with open(file_path, 'rb') as f:
+        return f.read(2)[1:] == b'\n'
+
+def remove_punctuation_from_dialogue(json_file, pretty=False):
     """
     Remove punctuation from the 'text' field in dialogue JSON files
     while preserving the rest of the structure and any HTML-like tags.
     
     Args:
         json_file: Path to the dialogue JSON file
+        pretty: Whether to write indented JSON
+    
+    Returns:
+        "processed" if the output file was written, "skipped" if it was already
+        up to date, or "unchanged" if there was nothing to write
     """
+    output_file = json_file.replace('.json', '_no_punctuation.json')
+    
+    # Skip the parse entirely if a non-empty output is already newer than the
+    # input and was written in the requested format
+    try:
+        output_stat = os.stat(output_file)
+        if (output_stat.st_size > 2
+                and output_stat.st_mtime_ns >= os.stat(json_file).st_mtime_ns
+                and _is_pretty_json(output_file) == pretty):
+            print(f"Already up to date: {output_file}")
+            return "skipped"
+    except FileNotFoundError:
+        pass
+    
     # Load the JSON file
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = json_utils.load_json(json_file)
     
     # Check if this is a dialogue file with the expected structure
     if 'dialogue' not in data:
         print(f"Warning: {json_file} does not contain a 'dialogue' field. Skipping.")
-        return False
+        return "unchanged"
     
     # Process each dialogue entry
     modified = False
@@ -27,41 +75,8 @@ def remove_punctuation_from_dialogue(json_file):
             # Store the original text
             original_text = entry['text']
             
-            # First, identify and protect Vietnamese tags
-            # Find all Vietnamese tag pairs and their content
-            vietnamese_tags = re.findall(r'<vietnamese>([^<]+)</vietnamese>', original_text)
-            text_with_placeholders = original_text
-            
-            # Replace each Vietnamese tag pair with a special token
-            viet_tag_map = {}
-            for i, viet_content in enumerate(vietnamese_tags):
-                placeholder = f"__VIET_TAG_{i}__"
-                viet_tag_map[placeholder] = f"<vietnamese>{viet_content}</vietnamese>"
-                text_with_placeholders = text_with_placeholders.replace(
-                    f"<vietnamese>{viet_content}</vietnamese>", 
-                    placeholder
-                )
-            
-            # Also preserve other HTML-like tags
-            other_tags = re.findall(r'<[^>]+>', text_with_placeholders)
-            for i, tag in enumerate(other_tags):
-                placeholder = f"__HTML_TAG_{i}__"
-                viet_tag_map[placeholder] = tag
-                text_with_placeholders = text_with_placeholders.replace(tag, placeholder)
-            
-            # Also preserve parenthetical expressions like (vietnamese)
-            parenthetical_expressions = re.findall(r'\([^)]+\)', text_with_placeholders)
-            for i, expr in enumerate(parenthetical_expressions):
-                placeholder = f"__PAREN_{i}__"
-                viet_tag_map[placeholder] = expr
-                text_with_placeholders = text_with_placeholders.replace(expr, placeholder)
-            
-            # Now remove punctuation but preserve spaces
-            cleaned_text = re.sub(r'[.,!?;:"\[\]\{\}]', '', text_with_placeholders)
-            
-            # Restore the tags and parenthetical expressions
-            for placeholder, content in viet_tag_map.items():
-                cleaned_text = cleaned_text.replace(placeholder, content)
+            # Remove punctuation, keeping tags and parenthetical expressions intact
+            cleaned_text = strip_punctuation(original_text)
             
             # Update the text field if changes were made
             if cleaned_text != original_text:
@@ -70,21 +85,29 @@ def remove_punctuation_from_dialogue(json_file):
     
     # Save the modified JSON if changes were made
     if modified:
-        output_file = json_file.replace('.json', '_no_punctuation.json')
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        json_utils.dump_json(data, output_file, pretty)
         print(f"Processed {json_file} -> {output_file}")
-        return True
+        return "processed"
     else:
         print(f"No punctuation found in {json_file}")
-        return False
+        return "unchanged"
 
 def main():
-    # Find all dialogue JSON files in the data/audio directory
-    dialogue_files = glob.glob('data/audio/dialogue_*.json')
+    parser = argparse.ArgumentParser(description="Remove punctuation from dialogue JSON files")
+    parser.add_argument("--pretty", action="store_true", help="Write indented JSON instead of compact JSON")
+    args = parser.parse_args()
     
-    # Filter out any files that already have '_no_punctuation' in their name
-    dialogue_files = [f for f in dialogue_files if '_no_punctuation' not in f]
+    # Find all dialogue JSON files in the data/audio directory, leaving out
+    # any files that already have '_no_punctuation' in their name
+    dialogue_files = []
+    if os.path.isdir('data/audio'):
+        with os.scandir('data/audio') as entries:
+            dialogue_files = [
+                entry.path for entry in entries
+                if entry.name.startswith('dialogue_')
+                and entry.name.endswith('.json')
+                and '_no_punctuation' not in entry.name
+            ]
     
     if not dialogue_files:
         print("No dialogue JSON files found in data/audio directory.")
@@ -94,11 +117,15 @@ def main():
     
     # Process each file
     processed_count = 0
+    skipped_count = 0
     for file_path in dialogue_files:
-        if remove_punctuation_from_dialogue(file_path):
+        status = remove_punctuation_from_dialogue(file_path, args.pretty)
+        if status == "processed":
             processed_count += 1
+        elif status == "skipped":
+            skipped_count += 1
     
-    print(f"Completed processing {processed_count} files.")
+    print(f"Completed processing {processed_count} files ({skipped_count} already up to date).")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
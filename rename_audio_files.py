@@ -6,52 +6,73 @@ New format: topic_word_ID.mp3
 """
 
 import os
-import json
 import glob
 import re
+from concurrent.futures import ThreadPoolExecutor
+import json_utils
+
+def rename_audio_file(audio_file):
+    """
+    Rename one audio file from the old naming convention to topic_word_ID.mp3.
+    
+    Args:
+        audio_file: Path to an audio file named dialogue_ID_elevenlabs_slow.mp3
+    
+    Returns:
+        The new path, or None if the file could not be renamed
+    """
+    # Extract the dialogue ID from the filename
+    filename = os.path.basename(audio_file)
+    match = re.match(r'dialogue_([a-f0-9]+)_elevenlabs_slow\.mp3', filename)
+    
+    if not match:
+        print(f"Could not extract dialogue ID from filename: {filename}")
+        return None
+    
+    dialogue_id = match.group(1)
+    
+    # Find the corresponding dialogue file
+    dialogue_files = glob.glob(f"data/dialogues/*_{dialogue_id}.json")
+    
+    if not dialogue_files:
+        print(f"Could not find dialogue file for ID: {dialogue_id}")
+        return None
+    
+    # Load the dialogue file to get the topic word
+    dialogue_data = json_utils.load_json(dialogue_files[0])
+    
+    topic_word = dialogue_data.get("topic_word", "")
+    
+    if not topic_word:
+        print(f"No topic word found for dialogue ID: {dialogue_id}")
+        return None
+    
+    # Create the new filename
+    new_filename = f"{topic_word}_{dialogue_id}.mp3"
+    new_path = os.path.join(os.path.dirname(audio_file), new_filename)
+    
+    # Rename the file
+    print(f"Renaming {filename} to {new_filename}")
+    os.rename(audio_file, new_path)
+    return new_path
 
 def main():
     # Get all audio files with the old naming convention
-    audio_files = glob.glob("data/audio/dialogue_*_elevenlabs_slow.mp3")
+    audio_files = []
+    if os.path.isdir("data/audio"):
+        with os.scandir("data/audio") as entries:
+            audio_files = [
+                entry.path for entry in entries
+                if entry.name.startswith("dialogue_") and entry.name.endswith("_elevenlabs_slow.mp3")
+            ]
     print(f"Found {len(audio_files)} audio files to rename")
     
-    for audio_file in audio_files:
-        # Extract the dialogue ID from the filename
-        filename = os.path.basename(audio_file)
-        match = re.match(r'dialogue_([a-f0-9]+)_elevenlabs_slow\.mp3', filename)
-        
-        if not match:
-            print(f"Could not extract dialogue ID from filename: {filename}")
-            continue
-        
-        dialogue_id = match.group(1)
-        
-        # Find the corresponding dialogue file
-        dialogue_files = glob.glob(f"data/dialogues/*_{dialogue_id}.json")
-        
-        if not dialogue_files:
-            print(f"Could not find dialogue file for ID: {dialogue_id}")
-            continue
-        
-        # Load the dialogue file to get the topic word
-        with open(dialogue_files[0], 'r', encoding='utf-8') as f:
-            dialogue_data = json.load(f)
-        
-        topic_word = dialogue_data.get("topic_word", "")
-        
-        if not topic_word:
-            print(f"No topic word found for dialogue ID: {dialogue_id}")
-            continue
-        
-        # Create the new filename
-        new_filename = f"{topic_word}_{dialogue_id}.mp3"
-        new_path = os.path.join(os.path.dirname(audio_file), new_filename)
-        
-        # Rename the file
-        print(f"Renaming {filename} to {new_filename}")
-        os.rename(audio_file, new_path)
+    # Each file is independent and the work is I/O bound, so threads are enough
+    if audio_files:
+        with ThreadPoolExecutor(max_workers=min(16, len(audio_files))) as executor:
+            list(executor.map(rename_audio_file, audio_files))
     
     print("Renaming complete")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -7,9 +7,6 @@ mkdir data\dialogues data\audio data\videos models 2>nul
 echo Installing Python dependencies...
 pip install -r requirements.txt
 
-echo Downloading NLTK data...
-python download_nltk_data.py
-
 REM Check if FFmpeg is installed
 where ffmpeg >nul 2>nul
 if %ERRORLEVEL% NEQ 0 (
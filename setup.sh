@@ -9,10 +9,6 @@ mkdir -p data/dialogues data/audio data/videos models
 echo "Installing Python dependencies..."
 pip install -r requirements.txt
 
-# Download NLTK data
-echo "Downloading NLTK data..."
-python download_nltk_data.py
-
 # Check if FFmpeg is installed
 if ! command -v ffmpeg &> /dev/null; then
     echo "FFmpeg is not installed. Please install it manually:"
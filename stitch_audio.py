@@ -6,24 +6,73 @@ This script takes the stitching info JSON files and creates a full dialogue audi
 import os
 import argparse
 import json
-import glob
+import functools
 import sys
 import wave
 import io
+import shutil
+import subprocess
+import tempfile
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import config
 import utils
 
+# Shared 300 ms silence clip played before and after each Vietnamese word
+SILENCE_CLIP_PATH = os.path.join(config.AUDIO_PATH, "_assets", "silence_300ms.mp3")
+
+def ensure_silence_clip():
+    """
+    Create the shared silence clip if it doesn't exist yet.
+    
+    Returns:
+        Path to the silence clip
+    """
+    if not os.path.exists(SILENCE_CLIP_PATH):
+        assets_dir = os.path.dirname(SILENCE_CLIP_PATH)
+        os.makedirs(assets_dir, exist_ok=True)
+        
+        # Encode to a temporary file first so a partial clip is never picked up
+        fd, temp_path = tempfile.mkstemp(suffix=".mp3", dir=assets_dir)
+        os.close(fd)
+        try:
+            subprocess.run(
+                ["ffmpeg", "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo", "-t", "0.3", "-q:a", "9", temp_path, "-y"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True
+            )
+            # mkstemp creates the file readable only by its owner
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, SILENCE_CLIP_PATH)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return SILENCE_CLIP_PATH
+
+def _find_stitching_files(audio_dir):
+    """List the stitching info files in an audio directory."""
+    with os.scandir(audio_dir) as entries:
+        return [entry.path for entry in entries if entry.name.endswith("_stitching_info.json")]
+
 def find_audio_directories():
-    """Find all audio directories that have stitching info files."""
+    """
+    Find all audio directories that have stitching info files.
+    
+    Returns:
+        List of (audio_dir, stitching_files, mtime) tuples
+    """
     audio_dirs = []
-    for audio_dir in glob.glob(f"{config.AUDIO_PATH}/*"):
-        if os.path.isdir(audio_dir):
+    if not os.path.isdir(config.AUDIO_PATH):
+        return audio_dirs
+    
+    with os.scandir(config.AUDIO_PATH) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
             # Check if there are any stitching info files
-            stitching_files = glob.glob(f"{audio_dir}/*_stitching_info.json")
+            stitching_files = _find_stitching_files(entry.path)
             if stitching_files:
-                audio_dirs.append(audio_dir)
+                audio_dirs.append((entry.path, stitching_files, entry.stat().st_mtime))
     return audio_dirs
 
 def convert_mp3_to_wav(mp3_path, wav_path):
@@ -31,14 +80,11 @@ def convert_mp3_to_wav(mp3_path, wav_path):
     try:
         print(f"Converting {mp3_path} to WAV format...")
         
-        # Read the MP3 file
-        with open(mp3_path, 'rb') as f:
-            mp3_data = f.read()
-        
         # Use an online converter API (this is a placeholder - you would need to implement this)
-        # For now, we'll just copy the MP3 file to the WAV path
-        with open(wav_path, 'wb') as f:
-            f.write(mp3_data)
+        # For now, we'll just copy the MP3 file to the WAV path. shutil.copyfile
+        # streams the data (with sendfile where available) instead of reading
+        # the whole file into memory
+        shutil.copyfile(mp3_path, wav_path)
         
         print(f"Converted to {wav_path}")
         return True
@@ -56,16 +102,26 @@ def create_silent_wav(duration_ms, wav_path):
         
         # Calculate number of frames
         n_frames = int(duration_ms / 1000 * sample_rate)
+        frame_size = n_channels * sample_width
         
-        # Create silent frames
-        silent_frames = b'\x00' * (n_frames * n_channels * sample_width)
+        # Write the silence from one reusable 64 KiB buffer instead of
+        # allocating the whole duration at once
+        chunk_frames = 65536 // frame_size
+        silent_chunk = memoryview(bytes(chunk_frames * frame_size))
         
         # Create WAV file
         with wave.open(wav_path, 'wb') as wav_file:
             wav_file.setnchannels(n_channels)
             wav_file.setsampwidth(sample_width)
             wav_file.setframerate(sample_rate)
-            wav_file.writeframes(silent_frames)
+            # Declare the length up front so the header is written correctly once
+            wav_file.setnframes(n_frames)
+            
+            remaining = n_frames
+            while remaining > 0:
+                frames = min(remaining, chunk_frames)
+                wav_file.writeframesraw(silent_chunk[:frames * frame_size])
+                remaining -= frames
         
         print(f"Created silent WAV file: {wav_path}")
         return True
@@ -73,110 +129,148 @@ def create_silent_wav(duration_ms, wav_path):
         print(f"Error creating silent WAV file: {e}")
         return False
 
+@functools.lru_cache(maxsize=256)
+def _load_stitching_info_cached(stitching_info_path, mtime):
+    with open(stitching_info_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_stitching_info(stitching_info_path):
+    """
+    Load a stitching info JSON file.
+    Parsed files are cached per (path, modification time) and must not be modified.
+    
+    Args:
+        stitching_info_path: Path to the stitching info file
+    
+    Returns:
+        The stitching info dictionary
+    """
+    return _load_stitching_info_cached(stitching_info_path, os.path.getmtime(stitching_info_path))
+
+@functools.lru_cache(maxsize=256)
+def _get_audio_duration_cached(audio_path, mtime):
+    output = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", audio_path],
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+    ).stdout
+    return float(output)
+
+def get_audio_duration(audio_path):
+    """
+    Get the duration of an audio file using ffprobe.
+    Results are cached per (path, modification time), so stitching files that
+    share an English track only probe it once.
+    
+    Args:
+        audio_path: Path to the audio file
+    
+    Returns:
+        Duration in seconds
+    """
+    return _get_audio_duration_cached(audio_path, os.path.getmtime(audio_path))
+
+def _concat_quote(path):
+    """Quote a path as an absolute file entry for an ffconcat list."""
+    return "'" + os.path.abspath(path).replace("'", "'\\''") + "'"
+
 def stitch_audio_file(stitching_info_path, output_path):
-    """Create a batch file with ffmpeg commands to stitch audio files."""
+    """Stitch the English audio and the Vietnamese word audio files together with ffmpeg."""
     try:
         # Load stitching info
-        with open(stitching_info_path, 'r', encoding='utf-8') as f:
-            stitching_info = json.load(f)
+        stitching_info = load_stitching_info(stitching_info_path)
         
         # Get the English audio file
         english_audio_path = stitching_info["english_audio"]
         
-        # Create a batch file with ffmpeg commands
-        batch_lines = []
-        batch_lines.append("@echo off")
-        batch_lines.append("echo Stitching audio files...")
+        print(f"Stitching audio files into {output_path}...")
         
         # If there are no Vietnamese words, just copy the English audio
         if not stitching_info["vietnamese_words"]:
-            batch_lines.append(f"copy \"{english_audio_path}\" \"{output_path}\"")
+            shutil.copyfile(english_audio_path, output_path)
         else:
             # Get the Vietnamese word positions and sort them by start position
             viet_words = sorted(stitching_info["vietnamese_words"], key=lambda x: x["start_pos"])
             
-            # Create a temporary directory for intermediate files
-            temp_dir = os.path.join(os.path.dirname(output_path), "temp")
-            batch_lines.append(f"mkdir \"{temp_dir}\" 2>nul")
+            # The same short pause clip is played before and after every Vietnamese word
+            pause_path = ensure_silence_clip()
+            
+            # Build an ffconcat list that plays slices of the English audio around
+            # the Vietnamese words using inpoint/outpoint, so no segment has to be
+            # cut into an intermediate file
+            concat_lines = ["ffconcat version 1.0"]
+            english_entry = f"file {_concat_quote(english_audio_path)}"
+            pause_entry = f"file {_concat_quote(pause_path)}"
             
-            # Create a list of files to concatenate
-            concat_files = []
+            # Estimate positions in the audio file based on text position
+            text_length = len(stitching_info["text"])
+            
+            # Use the real length of the English audio, falling back to
+            # assuming a 3-minute audio file if it can't be probed
+            try:
+                english_duration_sec = get_audio_duration(english_audio_path)
+            except (OSError, ValueError, subprocess.CalledProcessError) as e:
+                print(f"Could not get duration of {english_audio_path}, assuming 180 seconds: {e}")
+                english_duration_sec = 180
             
             # Add segments before, between, and after Vietnamese words
             current_pos = 0
-            for i, word_info in enumerate(viet_words):
-                # Get the Vietnamese word audio
-                viet_audio_path = word_info["audio_path"]
-                
-                # Estimate the position in the audio file based on text position
-                text = stitching_info["text"]
-                text_length = len(text)
-                
-                # Assuming a 3-minute audio file for the full text
-                english_duration_sec = 180
-                
+            for word_info in viet_words:
                 # Calculate the approximate start and end positions in the audio
                 start_sec = (word_info["start_pos"] / text_length) * english_duration_sec
                 end_sec = (word_info["end_pos"] / text_length) * english_duration_sec
                 
                 # Add the segment before the Vietnamese word
                 if current_pos < start_sec:
-                    before_segment = f"{temp_dir}\\before_{i}.mp3"
-                    batch_lines.append(f"ffmpeg -i \"{english_audio_path}\" -ss {current_pos} -to {start_sec} -c copy \"{before_segment}\" -y")
-                    concat_files.append(before_segment)
-                
-                # Add a short pause before the Vietnamese word
-                pause_before = f"{temp_dir}\\pause_before_{i}.mp3"
-                batch_lines.append(f"ffmpeg -f lavfi -i anullsrc=r=44100:cl=stereo -t 0.3 \"{pause_before}\" -y")
-                concat_files.append(pause_before)
+                    concat_lines += (english_entry, f"inpoint {current_pos}", f"outpoint {start_sec}")
                 
-                # Add the Vietnamese word
-                concat_files.append(viet_audio_path)
-                
-                # Add a short pause after the Vietnamese word
-                pause_after = f"{temp_dir}\\pause_after_{i}.mp3"
-                batch_lines.append(f"ffmpeg -f lavfi -i anullsrc=r=44100:cl=stereo -t 0.3 \"{pause_after}\" -y")
-                concat_files.append(pause_after)
+                # Add the Vietnamese word between two short pauses
+                concat_lines += (pause_entry, f"file {_concat_quote(word_info['audio_path'])}", pause_entry)
                 
                 # Update the current position
                 current_pos = end_sec
             
             # Add the segment after the last Vietnamese word
             if current_pos < english_duration_sec:
-                after_segment = f"{temp_dir}\\after.mp3"
-                batch_lines.append(f"ffmpeg -i \"{english_audio_path}\" -ss {current_pos} -c copy \"{after_segment}\" -y")
-                concat_files.append(after_segment)
-            
-            # Create a file list for ffmpeg
-            file_list = f"{temp_dir}\\file_list.txt"
-            # Use raw strings for the file paths
-            batch_lines.append(f"echo file '{concat_files[0]}' > \"{file_list}\"")
-            for file_path in concat_files[1:]:
-                batch_lines.append(f"echo file '{file_path}' >> \"{file_list}\"")
+                concat_lines += (english_entry, f"inpoint {current_pos}")
             
-            # Concatenate all files
-            batch_lines.append(f"ffmpeg -f concat -safe 0 -i \"{file_list}\" -c copy \"{output_path}\" -y")
+            # Write the file list for ffmpeg's concat demuxer
+            fd, file_list = tempfile.mkstemp(suffix="_concat.txt", dir=os.path.dirname(output_path) or ".")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write("\n".join(concat_lines) + "\n")
+                
+                # Concatenate everything in one stream-copy pass
+                result = subprocess.run(
+                    ["ffmpeg", "-f", "concat", "-safe", "0", "-i", file_list, "-c", "copy", output_path, "-y"],
+                    stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+                )
+            finally:
+                os.remove(file_list)
             
-            # Clean up temporary files
-            batch_lines.append(f"rmdir /s /q \"{temp_dir}\"")
-        
-        # Write the batch file
-        batch_path = os.path.join(os.path.dirname(output_path), "stitch_audio.bat")
-        with open(batch_path, 'w', encoding='utf-8') as f:
-            f.write("\n".join(batch_lines))
-        
-        print(f"Batch file created: {batch_path}")
-        print(f"To stitch the audio files, run the batch file: {batch_path}")
+            if result.returncode != 0:
+                print(f"FFmpeg failed to stitch {output_path}: {result.stderr.decode('utf-8', errors='replace')[-500:]}")
+                return False
         
+        print(f"Stitched audio saved to {output_path}")
         return True
     except Exception as e:
-        print(f"Error creating batch file: {e}")
+        print(f"Error stitching audio files: {e}")
         return False
 
-def process_audio_directory(audio_dir):
-    """Process all stitching info files in an audio directory."""
+def process_audio_directory(audio_dir, stitching_files=None):
+    """
+    Process all stitching info files in an audio directory.
+    
+    Args:
+        audio_dir: Path to the audio directory
+        stitching_files: Stitching info files in the directory, if already listed
+    
+    Returns:
+        True if every file was processed successfully
+    """
     # Find all stitching info files
-    stitching_files = glob.glob(f"{audio_dir}/*_stitching_info.json")
+    if stitching_files is None:
+        stitching_files = _find_stitching_files(audio_dir)
     
     if not stitching_files:
         print(f"No stitching info files found in {audio_dir}")
@@ -190,14 +284,14 @@ def process_audio_directory(audio_dir):
         # Create the output path
         output_path = f"{audio_dir}/{base_name}_stitched.mp3"
         
-        # Create batch file for stitching
+        # Stitch the audio files
         if not stitch_audio_file(stitching_file, output_path):
             success = False
     
     return success
 
 def main():
-    parser = argparse.ArgumentParser(description='Create batch files for stitching audio files')
+    parser = argparse.ArgumentParser(description='Stitch audio files with proper Vietnamese pronunciation')
     parser.add_argument('--audio_dir', type=str,
                         help='Directory containing audio files and stitching info')
     parser.add_argument('--all', action='store_true',
@@ -214,9 +308,15 @@ def main():
             print("No audio directories with stitching info found.")
             return
         
-        for audio_dir in audio_dirs:
+        def process(item):
+            audio_dir, stitching_files, _ = item
             print(f"Processing audio directory: {audio_dir}")
-            process_audio_directory(audio_dir)
+            return process_audio_directory(audio_dir, stitching_files)
+        
+        # Directories are independent of each other. Threads keep the parsed
+        # stitching info cache shared, and the heavy lifting happens in ffmpeg
+        with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, len(audio_dirs))) as executor:
+            list(executor.map(process, audio_dirs))
     elif args.audio_dir:
         # Process a specific audio directory
         if not os.path.exists(args.audio_dir):
@@ -232,12 +332,12 @@ def main():
             return
         
         # Sort by modification time, newest first
-        audio_dirs.sort(key=os.path.getmtime, reverse=True)
+        audio_dirs.sort(key=lambda item: item[2], reverse=True)
         
         # Process the most recent audio directory
-        audio_dir = audio_dirs[0]
+        audio_dir, stitching_files, _ = audio_dirs[0]
         print(f"Processing most recent audio directory: {audio_dir}")
-        process_audio_directory(audio_dir)
+        process_audio_directory(audio_dir, stitching_files)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
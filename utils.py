@@ -3,27 +3,60 @@ Utility functions for the language learning content generation system.
 """
 
 import os
-import json
 import logging
+import logging.handlers
+import atexit
 import sys
 from pathlib import Path
 import config
 import unicodedata
 import re
+import json_utils
 
 # Set up logging with UTF-8 encoding
+_LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Buffer log file records and write them in batches instead of one write per
+# record; errors are written straight away and the rest is flushed at exit
+_log_file_handler = logging.FileHandler("langbot.log", encoding='utf-8')
+_log_file_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+_log_buffer_handler = logging.handlers.MemoryHandler(1024, flushLevel=logging.ERROR, target=_log_file_handler)
+atexit.register(_log_buffer_handler.flush)
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format=_LOG_FORMAT,
     handlers=[
-        logging.FileHandler("langbot.log", encoding='utf-8'),
+        _log_buffer_handler,
         logging.StreamHandler(sys.stdout)  # Use stdout instead of stderr for better Unicode support
     ]
 )
 logger = logging.getLogger("langbot")
 
-def ensure_directories_exist():
-    """Create necessary directories if they don't exist."""
+# Characters not allowed in dialogue filenames. In ASCII mode \w excludes every
+# non-ASCII character, so one pass replaces both those and punctuation/spaces
+_UNSAFE_FILENAME_RE = re.compile(r'[^\w\-]', re.ASCII)
+
+def sanitize_filename(text):
+    """Replace non-ASCII and other problematic filename characters with underscores."""
+    # Normalize unicode characters so accented letters keep their ASCII base letter
+    # (pure ASCII text is unchanged by normalization, so skip it)
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+    return _UNSAFE_FILENAME_RE.sub('_', text)
+
+# Set once the data directories have been created in this process
+_DIRS_READY = False
+
+def ensure_directories_exist(force=False):
+    """
+    Create necessary directories if they don't exist.
+    This only touches the filesystem on the first call unless force is set.
+    """
+    global _DIRS_READY
+    if _DIRS_READY and not force:
+        return
+    
     directories = [
         os.path.dirname(config.VOCAB_LIST_PATH),
         os.path.dirname(config.USED_WORDS_PATH),
@@ -34,42 +67,46 @@ def ensure_directories_exist():
     
     for directory in directories:
         Path(directory).mkdir(parents=True, exist_ok=True)
-        logger.info(f"Ensured directory exists: {directory}")
+    logger.debug(f"Ensured {len(directories)} directories exist")
+    _DIRS_READY = True
+
+def _read_word_list(path):
+    """Read a one-word-per-line file, skipping blank lines."""
+    # One read and one split instead of iterating the file line by line
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().split('\n')
+    return [word for word in map(str.strip, lines) if word]
 
 def get_used_words():
     """Get the list of already used vocabulary words."""
     if not os.path.exists(config.USED_WORDS_PATH):
         return []
     
-    with open(config.USED_WORDS_PATH, 'r', encoding='utf-8') as f:
-        return [line.strip() for line in f if line.strip()]
+    return _read_word_list(config.USED_WORDS_PATH)
+
+def add_used_words(words):
+    """Add several words to the used words list with a single open and write."""
+    words = list(words)
+    with open(config.USED_WORDS_PATH, 'a', encoding='utf-8', buffering=65536) as f:
+        f.writelines(f"{word}\n" for word in words)
+    if len(words) == 1:
+        logger.info(f"Added '{words[0]}' to used words list")
+    else:
+        logger.info(f"Added {len(words)} words to used words list")
 
 def add_used_word(word):
     """Add a word to the used words list."""
-    with open(config.USED_WORDS_PATH, 'a', encoding='utf-8') as f:
-        f.write(f"{word}\n")
-    logger.info(f"Added '{word}' to used words list")
+    add_used_words([word])
 
 def save_dialogue(vocab_word, dialogue_data):
     """Save a generated dialogue to a JSON file."""
     ensure_directories_exist()
     
     # Sanitize filename to avoid issues with special characters
-    # Replace non-ASCII characters with their closest ASCII equivalents or underscores
-    def sanitize_filename(text):
-        # Normalize unicode characters
-        text = unicodedata.normalize('NFKD', text)
-        # Replace non-ASCII characters with underscores
-        text = re.sub(r'[^\x00-\x7F]', '_', text)
-        # Replace spaces and other problematic characters
-        text = re.sub(r'[^\w\-_]', '_', text)
-        return text
-    
     safe_vocab = sanitize_filename(vocab_word)
     filename = f"{config.DIALOGUES_PATH}/{safe_vocab}_{dialogue_data['id']}.json"
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(dialogue_data, f, ensure_ascii=False, indent=2)
+    json_utils.dump_json(dialogue_data, filename, pretty=True)
     
     logger.info(f"Saved dialogue for '{vocab_word}' to {filename}")
     return filename
@@ -80,15 +117,13 @@ def load_vocab_list():
         logger.warning(f"Vocabulary list not found at {config.VOCAB_LIST_PATH}")
         return []
     
-    with open(config.VOCAB_LIST_PATH, 'r', encoding='utf-8') as f:
-        return [line.strip() for line in f if line.strip()]
+    return _read_word_list(config.VOCAB_LIST_PATH)
 
 def save_vocab_list(vocab_list):
     """Save the vocabulary list to file."""
     ensure_directories_exist()
     
-    with open(config.VOCAB_LIST_PATH, 'w', encoding='utf-8') as f:
-        for word in vocab_list:
-            f.write(f"{word}\n")
+    with open(config.VOCAB_LIST_PATH, 'w', encoding='utf-8', buffering=131072) as f:
+        f.writelines(f"{word}\n" for word in vocab_list)
     
     logger.info(f"Saved vocabulary list with {len(vocab_list)} words") 
\ No newline at end of file